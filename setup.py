@@ -237,6 +237,7 @@ install_requires = [
     'qtawesome>=1.2.1',
     'qtconsole>=5.3.2,<5.4.0',
     'qtpy>=2.1.0',
+    'requests>=2.18.0',
     'rtree>=0.9.7',
     'setuptools>=49.6.0',
     'sphinx>=0.6.6',
@@ -261,6 +262,7 @@ extras_require = {
         'coverage',
         'cython',
         'flaky',
+        'ijson',
         'matplotlib',
         'pandas',
         'pillow',
@@ -13,6 +13,7 @@ sip API incompatibility issue in spyder's non-gui modules)
 """
 
 import codecs
+from functools import lru_cache
 import locale
 import os
 import os.path as osp
@@ -70,6 +71,7 @@ def running_in_ci_with_conda():
     return running_in_ci() and os.environ.get('USE_CONDA', None) == 'true'
 
 
+@lru_cache(maxsize=1024)
 def is_stable_version(version):
     """
     Return true if version is stable, i.e. with letters in the final component.
@@ -63,6 +63,7 @@ QSTYLIZER_REQVER = '>=0.2.2'
 QTAWESOME_REQVER = '>=1.2.1'
 QTCONSOLE_REQVER = '>=5.3.2;<5.4.0'
 QTPY_REQVER = '>=2.1.0'
+REQUESTS_REQVER = '>=2.18.0'
 RTREE_REQVER = '>=0.9.7'
 SETUPTOOLS_REQVER = '>=49.6.0'
 SPHINX_REQVER = '>=0.6.6'
@@ -76,6 +77,7 @@ WATCHDOG_REQVER = None if is_pynsist() else '>=0.10.3'
 
 # Optional dependencies
 CYTHON_REQVER = '>=0.21'
+IJSON_REQVER = '>=3.0'
 MATPLOTLIB_REQVER = '>=3.0.0'
 NUMPY_REQVER = '>=1.7'
 PANDAS_REQVER = '>=1.1.1'
@@ -226,6 +228,10 @@ DESCRIPTIONS = [
      'package_name': "qtpy",
      'features': _("Abstraction layer for Python Qt bindings."),
      'required_version': QTPY_REQVER},
+    {'modname': "requests",
+     'package_name': "requests",
+     'features': _("Check for updates and download installers."),
+     'required_version': REQUESTS_REQVER},
     {'modname': "rtree",
      'package_name': "rtree",
      'features': _("Fast access to code snippets regions"),
@@ -264,6 +270,11 @@ DESCRIPTIONS += [
      'features': _("Run Cython files in the IPython Console"),
      'required_version': CYTHON_REQVER,
      'kind': OPTIONAL},
+    {'modname': "ijson",
+     'package_name': "ijson",
+     'features': _("Faster checks for Spyder updates"),
+     'required_version': IJSON_REQVER,
+     'kind': OPTIONAL},
     {'modname': "matplotlib",
      'package_name': "matplotlib",
      'features': _("2D/3D plotting in the IPython console"),
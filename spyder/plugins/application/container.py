@@ -42,6 +42,9 @@ from spyder.workers.updates import WorkerUpdates
 # Localization
 _ = get_translation('spyder')
 
+# Seconds to wait for the update workers to stop when closing
+WORKERS_CLOSE_TIMEOUT = 1
+
 
 class ApplicationPluginMenus:
     DebugLogsMenu = "debug_logs_menu"
@@ -117,7 +120,6 @@ class ApplicationContainer(PluginMainContainer):
                  .connect(self.set_installer_path))
             self.application_update_status.set_no_status()
         self.give_updates_feedback = False
-        self.thread_updates = None
         self.worker_updates = None
         self.updates_timer = None
 
@@ -228,9 +230,11 @@ class ApplicationContainer(PluginMainContainer):
         self.dialog_manager.close_all()
         if self.updates_timer is not None:
             self.updates_timer.stop()
-        if self.thread_updates is not None:
-            self.thread_updates.quit()
-            self.thread_updates.wait()
+        if self.worker_updates is not None:
+            self.worker_updates.wait(WORKERS_CLOSE_TIMEOUT)
+        if self.application_update_status is not None:
+            self.application_update_status.cancel_download(
+                WORKERS_CLOSE_TIMEOUT)
         if self.dependencies_thread is not None:
             self.dependencies_thread.quit()
             self.dependencies_thread.wait()
@@ -352,7 +356,7 @@ class ApplicationContainer(PluginMainContainer):
         # Update checkbox based on user interaction
         self.set_conf(option, check_updates)
 
-        # Enable check_updates_action after the thread has finished
+        # Enable check_updates_action after the worker has finished
         self.check_updates_action.setDisabled(False)
 
         # Provide feeback when clicking menu if check on startup is on
@@ -360,21 +364,18 @@ class ApplicationContainer(PluginMainContainer):
 
     @Slot()
     def check_updates(self, startup=False):
-        """Check for spyder updates on github releases using a QThread."""
-        # Disable check_updates_action while the thread is working
+        """Check for spyder updates on github releases using a thread pool."""
+        # Disable check_updates_action while the worker is running
         self.check_updates_action.setDisabled(True)
         self.application_update_status.set_status_checking()
 
-        if self.thread_updates is not None:
-            self.thread_updates.quit()
-            self.thread_updates.wait()
+        # Don't run a check that was scheduled before this one
+        if self.updates_timer is not None:
+            self.updates_timer.stop()
 
-        self.thread_updates = QThread(None)
-        self.worker_updates = WorkerUpdates(self, startup=startup)
-        self.worker_updates.sig_ready.connect(self._check_updates_ready)
-        self.worker_updates.sig_ready.connect(self.thread_updates.quit)
-        self.worker_updates.moveToThread(self.thread_updates)
-        self.thread_updates.started.connect(self.worker_updates.start)
+        worker_updates = WorkerUpdates(self, startup=startup)
+        worker_updates.sig_ready.connect(self._check_updates_ready)
+        self.worker_updates = worker_updates
 
         # Delay starting this check to avoid blocking the main window
         # while loading.
@@ -382,7 +383,7 @@ class ApplicationContainer(PluginMainContainer):
         self.updates_timer = QTimer(self)
         self.updates_timer.setInterval(60000)
         self.updates_timer.setSingleShot(True)
-        self.updates_timer.timeout.connect(self.thread_updates.start)
+        self.updates_timer.timeout.connect(worker_updates.run_in_thread_pool)
         self.updates_timer.start()
 
     @Slot(str)
@@ -12,7 +12,7 @@ import os
 import subprocess
 
 # Third-party imports
-from qtpy.QtCore import Qt, QThread, Signal
+from qtpy.QtCore import Qt, Signal
 from qtpy.QtWidgets import (QDialog, QHBoxLayout, QMessageBox,
                             QLabel, QProgressBar, QPushButton, QVBoxLayout,
                             QWidget)
@@ -150,7 +150,6 @@ class UpdateInstallerDialog(QDialog):
     def __init__(self, parent):
         self.cancelled = False
         self.status = NO_STATUS
-        self.download_thread = None
         self.download_worker = None
         self.installer_path = None
 
@@ -197,20 +196,24 @@ class UpdateInstallerDialog(QDialog):
 
     def start_installation(self, latest_release_version):
         """Start downloading the update and set downloading status."""
+        # Don't download the installer twice at the same time
+        if (
+            self.download_worker is not None
+            and self.download_worker.is_running()
+        ):
+            return
+
         self.latest_release_version = latest_release_version
         self.cancelled = False
         self._change_update_installation_status(
             status=DOWNLOADING_INSTALLER)
-        self.download_thread = QThread(None)
         self.download_worker = WorkerDownloadInstaller(
             self, self.latest_release_version)
         self.download_worker.sig_ready.connect(self.confirm_installation)
-        self.download_worker.sig_ready.connect(self.download_thread.quit)
         self.download_worker.sig_download_progress.connect(
             self.sig_download_progress.emit)
-        self.download_worker.moveToThread(self.download_thread)
-        self.download_thread.started.connect(self.download_worker.start)
-        self.download_thread.start()
+        self.download_worker.sig_cancelled.connect(self._download_cancelled)
+        self.download_worker.run_in_thread_pool()
 
     def cancel_installation(self):
         """Cancel the installation in progress."""
@@ -250,6 +253,8 @@ class UpdateInstallerDialog(QDialog):
         Ask users if they want to proceed with the installer execution.
         """
         if self.cancelled:
+            # The download finished before noticing it was cancelled
+            self._download_cancelled()
             return
         self._change_update_installation_status(status=DOWNLOAD_FINISHED)
         self.installer_path = installer_path
@@ -312,9 +317,28 @@ class UpdateInstallerDialog(QDialog):
         self.sig_installation_status.emit(
             self.status, self.latest_release_version)
 
+    def cancel_download(self, timeout=0):
+        """
+        Cancel the download in progress.
+
+        Wait at most `timeout` seconds for it to stop.
+        """
+        if self.download_worker is not None:
+            self.download_worker.cancelled = True
+            self.download_worker.wait(timeout)
+
     def _cancel_download(self):
         self._change_update_installation_status(status=CANCELLED)
-        self.download_worker.cancelled = True
-        self.download_thread.quit()
-        self.download_thread.wait()
-        self._change_update_installation_status(status=PENDING)
+        self.cancel_download()
+
+        # Let the update be continued once the download stopped, which is
+        # notified by the worker if it's still running.
+        if (
+            self.download_worker is None
+            or not self.download_worker.is_running()
+        ):
+            self._download_cancelled()
+
+    def _download_cancelled(self):
+        if self.status == CANCELLED:
+            self._change_update_installation_status(status=PENDING)
@@ -126,6 +126,9 @@ class ApplicationUpdateStatus(StatusBarWidget):
     def start_installation(self, latest_release):
         self.installer.start_installation(latest_release)
 
+    def cancel_download(self, timeout=0):
+        self.installer.cancel_download(timeout)
+
     def set_download_progress(self, current_value, total):
         percentage_progress = 0
         if total > 0:
@@ -4,10 +4,38 @@
 # Licensed under the terms of the MIT License
 # (see spyder/__init__.py for details)
 
+import io
+import os
+import os.path as osp
+import socket
+import threading
+
 import pytest
+import requests
+import urllib3
 
+from spyder import __version__
 from spyder.config.utils import is_anaconda
-from spyder.workers.updates import WorkerUpdates
+from spyder.workers import updates
+from spyder.workers.updates import WorkerDownloadInstaller, WorkerUpdates
+
+
+def _make_response(content=b'', status_code=200, **headers):
+    """Create a response sending `content` with the given headers."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers['Content-Length'] = str(len(content))
+    response.headers.update(headers)
+    response.raw = io.BytesIO(content)
+    return response
+
+
+@pytest.fixture
+def tmp_updates_dir(mocker, tmpdir):
+    """Temporary directory where the installers are downloaded."""
+    mocker.patch.object(updates.tempfile, 'gettempdir',
+                        return_value=str(tmpdir))
+    return tmpdir.join('spyder', 'updates')
 
 
 def test_update(qtbot):
@@ -48,6 +76,17 @@ def test_update_pre_to_final(qtbot):
     assert worker.update_available
 
 
+def test_update_thread_pool(qtbot):
+    """Test the worker can be run in a thread pool."""
+    worker = WorkerUpdates(None, False, version="3.3.2.dev0",
+                           releases=['3.3.1'])
+    with qtbot.waitSignal(worker.sig_ready, timeout=20000):
+        worker.run_in_thread_pool()
+    assert worker.wait(timeout=20)
+    assert not worker.is_running()
+    assert not worker.update_available
+
+
 @pytest.mark.skipif(not is_anaconda(),
                     reason='It only makes sense for Anaconda.')
 def test_releases_anaconda(qtbot):
@@ -57,5 +96,270 @@ def test_releases_anaconda(qtbot):
     assert '0.2.4' not in worker.releases
 
 
+def test_ssl_context_loaded_once(mocker):
+    """Test the CA bundles are not loaded again for each new connection."""
+    # Server that closes connections right away, so that every request
+    # opens a new one and fails during the TLS handshake.
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+
+    def serve():
+        for __ in range(2):
+            conn, __ = server.accept()
+            conn.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+
+    context = updates._SSL_CONTEXT
+    load = mocker.patch.object(context, 'load_verify_locations')
+    wrap = mocker.patch.object(context, 'wrap_socket',
+                               wraps=context.wrap_socket)
+    mocker.patch.object(updates._SESSION, 'trust_env', False)
+
+    url = 'https://127.0.0.1:{}'.format(server.getsockname()[1])
+    try:
+        for __ in range(2):
+            with pytest.raises(requests.ConnectionError):
+                updates._SESSION.get(url, timeout=5)
+    finally:
+        thread.join()
+        server.close()
+
+    assert wrap.call_count == 2
+    assert not load.called
+
+
+def test_ssl_context_trust_stores(mocker):
+    """Test the SSL context trusts the system and the bundled CAs."""
+    create = mocker.patch.object(updates.ssl, 'create_default_context')
+    context = updates._create_ssl_context()
+    create.assert_called_once_with()
+    context.load_verify_locations.assert_called_once_with(
+        cafile=requests.certs.where())
+
+
+def test_releases_not_modified(qtbot, mocker):
+    """Test we reuse the cached releases when they haven't changed."""
+    url = 'https://api.github.com/repos/spyder-ide/spyder/releases'
+    mocker.patch.object(updates, 'is_anaconda', return_value=False)
+    mocker.patch.object(
+        updates, '_load_releases_cache',
+        return_value={url: {'etag': '"foo"', 'last_modified': None,
+                            'releases': ['2.0.0', '1.0.0'],
+                            'version': '1.0.0'}})
+    mocker.patch.object(updates, '_save_releases_cache')
+
+    get = mocker.patch.object(updates._SESSION, 'get',
+                              return_value=_make_response(status_code=304))
+
+    worker = WorkerUpdates(None, False, version="1.0.0")
+    worker.start()
+    assert get.call_args[1]['headers'] == {'If-None-Match': '"foo"'}
+    assert worker.update_available
+    assert worker.latest_release == '2.0.0'
+    assert not updates._save_releases_cache.called
+
+
+def test_anaconda_releases(qtbot):
+    """Test Spyder releases are found in the Anaconda repodata."""
+    response = requests.Response()
+    response._content = (
+        b'{"info": {"subdir": "linux-64"}, "packages": {'
+        b'"spyder-5.3.0-py39_0.tar.bz2": {"depends": ["spyder-kernels"]}, '
+        b'"spyder-5.3.1-py39_0.tar.bz2": {"version": "5.3.1"}, '
+        b'"spyder-kernels-2.3.0-py39_0.tar.bz2": {"version": "2.3.0"}}, '
+        b'"removed": ["spyder-6.0.0-py39_0.tar.bz2"]}'
+    )
+
+    worker = WorkerUpdates(None, False, version="5.3.0")
+    assert worker._get_anaconda_releases(response) == ['5.3.1', '5.3.0']
+
+
+@pytest.mark.skipif(updates.ijson is None, reason='It needs ijson.')
+def test_github_releases_streamed(qtbot):
+    """Test Github releases are parsed up to the first update candidate."""
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(
+        b'[{"tag_name": "v6.0.0b1"}, {"tag_name": "v5.4.0"}, '
+        b'{"tag_name": "v5.3.0"}, {"tag_name": "v5.2.0"}]'
+    )
+
+    worker = WorkerUpdates(None, False, version="5.3.0")
+    assert worker._get_github_releases(response) == ['6.0.0b1', '5.4.0']
+
+    response.raw = io.BytesIO(response.raw.getvalue())
+    worker = WorkerUpdates(None, False, version="6.0.0a1")
+    assert worker._get_github_releases(response) == ['6.0.0b1']
+
+
+@pytest.mark.skipif(updates.ijson is None, reason='It needs ijson.')
+def test_github_releases_connection_lost(qtbot, mocker):
+    """Test losing the connection while parsing releases is reported."""
+    mocker.patch.object(updates, 'is_anaconda', return_value=False)
+    mocker.patch.object(updates, '_load_releases_cache', return_value={})
+    mocker.patch.object(updates, '_save_releases_cache')
+
+    class Raw(io.BytesIO):
+        def read(self, *args):
+            data = super().read(*args)
+            if not data:
+                raise urllib3.exceptions.ProtocolError('Connection lost')
+            return data
+
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = Raw(b'[{"tag_name": "v5.3.0"}, ')
+    mocker.patch.object(updates._SESSION, 'get', return_value=response)
+
+    worker = WorkerUpdates(None, False, version="5.3.0")
+    worker.start()
+    assert worker.error.startswith('Unable to connect to the internet.')
+
+
+def test_download_installer(qtbot, mocker, tmp_updates_dir):
+    """Test the installer is downloaded and its progress reported."""
+    content = b'0' * 100000
+    mocker.patch.object(updates._SESSION, 'get',
+                        return_value=_make_response(content))
+
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    progress = []
+    worker.sig_download_progress.connect(lambda *args: progress.append(args))
+    with qtbot.waitSignal(worker.sig_ready):
+        worker.start()
+
+    assert worker.error is None
+    assert osp.dirname(worker.installer_path).endswith('1000.0.0')
+    with open(worker.installer_path, 'rb') as f:
+        assert f.read() == content
+
+    total_size = len(content)
+    assert progress[0] == (0, total_size)
+    assert progress[-1] == (total_size, total_size)
+
+
+def test_download_installer_cancelled(qtbot, mocker, tmp_updates_dir):
+    """Test a download cancelled before it started is not run."""
+    get = mocker.patch.object(updates._SESSION, 'get')
+
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    ready = []
+    worker.sig_ready.connect(ready.append)
+    worker.cancelled = True
+    worker.run_in_thread_pool()
+    assert worker.wait(timeout=20)
+    assert not get.called
+    assert not ready
+
+
+def test_download_installer_cleanup(qtbot, mocker, tmp_updates_dir):
+    """Test installers downloaded for other versions are removed."""
+    mocker.patch.object(updates._SESSION, 'get',
+                        return_value=_make_response(b'0' * 1000))
+    tmp_updates_dir.ensure('0.1.0', 'installer').write('old')
+    tmp_updates_dir.ensure(__version__, dir=True)
+    tmp_updates_dir.ensure('1000.0.0', dir=True)
+
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    worker.start()
+    assert worker.error is None
+    assert sorted(p.basename for p in tmp_updates_dir.listdir()) == sorted(
+        [__version__, '1000.0.0'])
+
+
+def test_download_installer_up_to_date(qtbot, mocker, tmp_updates_dir):
+    """Test installers are downloaded again only if they changed."""
+    content = b'0' * 1000
+    get = mocker.patch.object(
+        updates._SESSION, 'get',
+        side_effect=lambda url, **kwargs: _make_response(content,
+                                                         ETag='"foo"'))
+    head_response = _make_response(content, ETag='"foo"')
+    mocker.patch.object(updates._SESSION, 'head',
+                        return_value=head_response)
+
+    # First download and reuse of the same installer
+    for __ in range(2):
+        worker = WorkerDownloadInstaller(None, '1000.0.0')
+        worker.start()
+        assert worker.error is None
+    assert get.call_count == 1
+
+    # Installer replaced on the server
+    head_response.headers['ETag'] = '"bar"'
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    worker.start()
+    assert worker.error is None
+    assert get.call_count == 2
+
+
+def test_download_installer_resume(qtbot, mocker, tmp_updates_dir):
+    """Test cancelled installer downloads are resumed."""
+    content = bytes(range(256)) * 4000
+
+    def get(url, headers, **kwargs):
+        if 'Range' in headers:
+            start = int(headers['Range'][len('bytes='):-1])
+            return _make_response(content[start:], status_code=206,
+                                  ETag='"foo"')
+        return _make_response(content, ETag='"foo"')
+
+    get = mocker.patch.object(updates._SESSION, 'get', side_effect=get)
+
+    # Cancel the download after some data was received
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+
+    def cancel(downloaded, total_size):
+        if downloaded:
+            worker.cancelled = True
+
+    worker.sig_download_progress.connect(cancel)
+    with qtbot.waitSignal(worker.sig_cancelled):
+        worker.start()
+    part_path = worker.installer_path + '.part'
+    assert not osp.isfile(worker.installer_path)
+    assert 0 < osp.getsize(part_path) < len(content)
+
+    # Resume it
+    resume = osp.getsize(part_path)
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    worker.start()
+    assert worker.error is None
+    assert get.call_args[1]['headers'] == {'Range': f'bytes={resume}-',
+                                           'If-Range': '"foo"'}
+    assert not osp.isfile(part_path)
+    with open(worker.installer_path, 'rb') as f:
+        assert f.read() == content
+
+
+def test_download_installer_no_resume(qtbot, mocker, tmp_updates_dir):
+    """Test downloads are not resumed if the installer can't be validated."""
+    content = b'0' * 1000
+
+    # No ETag or Last-Modified headers are sent
+    get = mocker.patch.object(
+        updates._SESSION, 'get',
+        side_effect=lambda url, **kwargs: _make_response(content))
+
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    worker.start()
+    installer_path = worker.installer_path
+
+    # Leave a partial installer instead of the complete one
+    os.remove(installer_path)
+    with open(installer_path + '.part', 'wb') as f:
+        f.write(b'1' * 500)
+
+    worker = WorkerDownloadInstaller(None, '1000.0.0')
+    worker.start()
+    assert worker.error is None
+    assert get.call_args[1]['headers'] == {}
+    with open(installer_path, 'rb') as f:
+        assert f.read() == content
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -10,79 +10,318 @@ import logging
 import os
 import os.path as osp
 import re
+import shutil
 import ssl
 import sys
 import tempfile
-from urllib.request import urlopen, urlretrieve
-from urllib.error import URLError, HTTPError
+import threading
+from importlib.util import find_spec
 
 # Third party imports
-from qtpy.QtCore import QObject, Signal
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, Signal
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+
+try:
+    # Optional package used to parse the releases data while it's downloaded
+    import ijson
+except ImportError:
+    ijson = None
 
 # Local imports
 from spyder import __version__
-from spyder.config.base import _, is_stable_version
-from spyder.py3compat import is_text_string
+from spyder.config.base import _, get_conf_path, is_stable_version
 from spyder.config.utils import is_anaconda
-from spyder.utils.programs import check_version, is_module_installed
+from spyder.utils.programs import check_version
 
 # Logger setup
 logger = logging.getLogger(__name__)
 
 
+def _create_ssl_context():
+    """
+    Create the SSL context used to verify the connections of the workers.
+
+    It trusts the certificates of the system store, which is where the
+    root certificates of proxies intercepting TLS connections are usually
+    installed (see spyder-ide/spyder#2685). The certificates bundled with
+    requests are trusted too, because the system store can be missing
+    or incomplete in our standalone installers.
+    """
+    context = ssl.create_default_context()
+    context.load_verify_locations(cafile=requests.certs.where())
+    return context
+
+
+# SSL context created once and shared by all connections, so that the
+# trust stores are not parsed again every time a connection is opened.
+_SSL_CONTEXT = _create_ssl_context()
+
+
+class _SSLContextAdapter(HTTPAdapter):
+    """HTTP adapter that verifies connections with a shared SSL context."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = _SSL_CONTEXT
+        return super().init_poolmanager(*args, **kwargs)
+
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+
+        # The shared context already has the CA bundles loaded, so prevent
+        # urllib3 from loading it again for every new connection.
+        if verify is True:
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+
+
+# Session shared by all workers so that consecutive requests to the same
+# host (e.g. checking for updates and then downloading the installer) reuse
+# an already established connection.
+_SESSION = requests.Session()
+_SESSION.mount('https://', _SSLContextAdapter())
+
+# Timeout (in seconds) for requests made by the workers
+_TIMEOUT = 10
+
+# Bounds for the size of the chunks used to download the installer
+_MIN_CHUNK_SIZE = 8192
+_MAX_CHUNK_SIZE = 1 << 20
+
+# Minimal amount of downloaded bytes between progress notifications
+_PROGRESS_STEP = 256 * 1024
+
+# Keys of the Spyder packages in the Anaconda repodata, capturing their
+# version (e.g. "spyder-5.3.0-py39_0.tar.bz2":). Extensions like
+# spyder-kernels don't match because their names don't continue with a
+# digit, and neither do removed packages because they are listed without
+# a colon after them.
+_SPYDER_PACKAGE_RE = re.compile(
+    rb'"spyder-([0-9][^"-]*)-[^"]*\.tar\.bz2"\s*:')
+
+# File name of the cache with the releases found in previous update checks
+_RELEASES_CACHE = 'releases_cache.json'
+
+
+def _load_releases_cache():
+    """
+    Load the releases found in previous update checks.
+
+    The cache maps each url to the releases retrieved from it and the
+    ETag and Last-Modified headers of the response where they came from.
+    """
+    try:
+        with open(get_conf_path(_RELEASES_CACHE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_releases_cache(cache):
+    """Save the releases found in the last update check."""
+    try:
+        with open(get_conf_path(_RELEASES_CACHE), 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+
+def _load_installer_validators(installer_path):
+    """
+    Load the ETag and Last-Modified headers sent with an installer.
+
+    They are saved next to the installer when its download starts, to check
+    later if it changed on the server.
+    """
+    try:
+        with open(installer_path + '.json', 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_installer_validators(installer_path, headers):
+    """Save the ETag and Last-Modified headers sent with an installer."""
+    validators = {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified')
+    }
+    with open(installer_path + '.json', 'w') as f:
+        json.dump(validators, f)
+
+
 class UpdateDownloadCancelledException(Exception):
     """Download for installer to update was cancelled."""
     pass
 
 
-class WorkerUpdates(QObject):
+class _ThreadPoolWorker(QRunnable):
+    """
+    Base class for workers run in a thread of the global QThreadPool.
+
+    Workers must be started with `run_in_thread_pool` so that `wait` can
+    tell whether they are still running.
+    """
+
+    def __init__(self):
+        QRunnable.__init__(self)
+
+        # Keep the worker alive after it runs so its results can be read
+        self.setAutoDelete(False)
+
+        # Set while the worker is neither scheduled nor running
+        self._finished = threading.Event()
+        self._finished.set()
+
+    def run_in_thread_pool(self):
+        """Run the worker in a thread of the global thread pool."""
+        self._finished.clear()
+        QThreadPool.globalInstance().start(self)
+
+    def is_running(self):
+        """Return whether the worker is scheduled or running."""
+        return not self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Wait until the worker finishes running.
+
+        Return False if it was still running after `timeout` seconds.
+        """
+        return self._finished.wait(timeout)
+
+    def run(self):
+        """Reimplemented QRunnable method."""
+        try:
+            self.start()
+        finally:
+            self._finished.set()
+
+    def start(self):
+        """Main method of the worker."""
+        raise NotImplementedError
+
+
+class _WorkerUpdatesSignals(QObject):
+    """Signals emitted by WorkerUpdates."""
+
+    sig_ready = Signal()
+
+
+class WorkerUpdates(_ThreadPoolWorker):
     """
     Worker that checks for releases using either the Anaconda
     default channels or the Github Releases page without
     blocking the Spyder user interface, in case of connection
     issues.
+
+    It's meant to be run in a thread of the global QThreadPool with
+    ``worker.run_in_thread_pool()``.
     """
-    sig_ready = Signal()
 
     def __init__(self, parent, startup, version="", releases=None):
-        QObject.__init__(self)
+        _ThreadPoolWorker.__init__(self)
+
+        # QRunnables are not QObjects, so signals are emitted through a
+        # companion object.
+        self._signals = _WorkerUpdatesSignals()
+        self.sig_ready = self._signals.sig_ready
+
         self._parent = parent
         self.error = None
         self.latest_release = None
         self.startup = startup
         self.releases = releases
+        self._is_anaconda = is_anaconda()
 
         if not version:
             self.version = __version__
         else:
             self.version = version
+        self._is_dev = 'dev' in self.version
 
     def check_update_available(self):
         """Checks if there is an update available.
 
         It takes as parameters the current version of Spyder and a list of
-        valid cleaned releases in chronological order.
-        Example: ['2.3.2', '2.3.3' ...] or with github ['2.3.4', '2.3.3' ...]
+        valid cleaned releases, from the newest to the oldest one.
+        Example: ['2.3.4', '2.3.3' ...]
         """
         # Don't perform any check for development versions
-        if 'dev' in self.version:
+        if self._is_dev:
             return (False, self.latest_release)
 
-        # Filter releases
-        if is_stable_version(self.version):
-            releases = [r for r in self.releases if is_stable_version(r)]
-        else:
-            releases = [r for r in self.releases
-                        if not is_stable_version(r) or r in self.version]
-
-        latest_release = releases[-1]
+        # Releases are sorted from the newest to the oldest one, so stop at
+        # the first one that can be offered as an update.
+        latest_release = next(
+            (r for r in self.releases if self._is_update_candidate(r)), None)
+        if latest_release is None:
+            return (False, self.latest_release)
 
         return (check_version(self.version, latest_release, '<'),
                 latest_release)
 
+    def _is_update_candidate(self, release):
+        """
+        Check if `release` can be offered as an update for the current version.
+
+        Stable versions are only updated to other stable versions, while
+        prereleases can be updated to other prereleases or to their final
+        version.
+        """
+        if is_stable_version(self.version):
+            return is_stable_version(release)
+        else:
+            return not is_stable_version(release) or release in self.version
+
+    def _get_anaconda_releases(self, page):
+        """Get the Spyder releases available in the Anaconda repodata."""
+        # Look for the Spyder packages directly in the raw data instead of
+        # decoding the whole repodata, which is very large.
+        releases = [version.decode()
+                    for version in _SPYDER_PACKAGE_RE.findall(page.content)]
+
+        # Packages are listed from the oldest to the newest one
+        releases.reverse()
+        return releases
+
+    def _get_github_releases(self, page):
+        """Get the Spyder releases published on Github."""
+        # Github lists releases from the newest to the oldest one
+        if ijson is not None:
+            # Parse tags while they are downloaded and stop as soon as the
+            # latest release that can be offered as an update is found.
+            page.raw.decode_content = True
+            releases = []
+            try:
+                for tag in ijson.items(page.raw, 'item.tag_name'):
+                    release = tag.lstrip('v')
+                    releases.append(release)
+                    if self._is_update_candidate(release):
+                        break
+            except urllib3.exceptions.HTTPError as error:
+                # The raw response is read directly, so errors while
+                # receiving it are not wrapped by requests.
+                raise requests.ConnectionError(error, response=page)
+        else:
+            data = json.loads(page.content)
+            releases = [item['tag_name'].lstrip('v') for item in data]
+
+        return releases
+
     def start(self):
         """Main method of the WorkerUpdates worker"""
-        if is_anaconda():
+        self.update_available = False
+        self.latest_release = __version__
+
+        # Development versions are never updated, so there's no need to
+        # retrieve releases for them.
+        if self._is_dev:
+            self._emit_ready()
+            return
+
+        if self._is_anaconda:
             self.url = 'https://repo.anaconda.com/pkgs/main'
             if os.name == 'nt':
                 self.url += '/win-64/repodata.json'
@@ -93,54 +332,74 @@ class WorkerUpdates(QObject):
         else:
             self.url = ('https://api.github.com/repos/'
                         'spyder-ide/spyder/releases')
-        self.update_available = False
-        self.latest_release = __version__
 
         error_msg = None
 
         try:
-            if hasattr(ssl, '_create_unverified_context'):
-                # Fix for spyder-ide/spyder#2685.
-                # [Works only with Python >=2.7.9]
-                # More info: https://www.python.org/dev/peps/pep-0476/#opting-out
-                context = ssl._create_unverified_context()
-                page = urlopen(self.url, context=context)
-            else:
-                page = urlopen(self.url)
-            try:
-                data = page.read()
-
-                # Needed step for python3 compatibility
-                if not is_text_string(data):
-                    data = data.decode()
-                data = json.loads(data)
-
-                if is_anaconda():
-                    if self.releases is None:
-                        self.releases = []
-                        for item in data['packages']:
-                            if ('spyder' in item and
-                                    not re.search(r'spyder-[a-zA-Z]', item)):
-                                self.releases.append(item.split('-')[1])
+            # Send the validators of the last retrieved releases, so the
+            # server only sends them again if they changed since then.
+            # Cached releases are only valid for the version they were
+            # retrieved for because Github ones are only parsed up to the
+            # latest release that can be offered as an update.
+            fetch_releases = self.releases is None
+            cache = _load_releases_cache() if fetch_releases else {}
+            cached = cache.get(self.url, {})
+            if cached.get('version') != self.version:
+                cached = {}
+            headers = {}
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+            with _SESSION.get(self.url, headers=headers, stream=True,
+                              timeout=_TIMEOUT) as page:
+                page.raise_for_status()
+                try:
+                    if page.status_code == 304:
+                        # Releases haven't changed since the last check
+                        self.releases = cached['releases']
+                    else:
+                        if self._is_anaconda:
+                            if self.releases is None:
+                                self.releases = self._get_anaconda_releases(
+                                    page)
+                        else:
+                            if self.releases is None:
+                                self.releases = self._get_github_releases(
+                                    page)
+
+                        if fetch_releases:
+                            cache[self.url] = {
+                                'etag': page.headers.get('ETag'),
+                                'last_modified': page.headers.get(
+                                    'Last-Modified'),
+                                'releases': self.releases,
+                                'version': self.version
+                            }
+                            _save_releases_cache(cache)
+
                     result = self.check_update_available()
-                else:
-                    if self.releases is None:
-                        self.releases = [item['tag_name'].replace('v', '')
-                                         for item in data]
-                        self.releases = list(reversed(self.releases))
-
-                result = self.check_update_available()
-                self.update_available, self.latest_release = result
-            except Exception:
-                error_msg = _('Unable to retrieve information.')
-        except HTTPError:
+                    self.update_available, self.latest_release = result
+                except (requests.ConnectionError,
+                        requests.exceptions.ChunkedEncodingError):
+                    # The connection was lost while receiving the releases
+                    raise
+                except Exception:
+                    error_msg = _('Unable to retrieve information.')
+        except requests.HTTPError:
             error_msg = _('Unable to retrieve information.')
-        except URLError:
+        except (requests.ConnectionError,
+                requests.exceptions.ChunkedEncodingError):
             error_msg = _('Unable to connect to the internet. <br><br>Make '
                           'sure the connection is working properly.')
         except Exception:
             error_msg = _('Unable to check for updates.')
 
+        self._emit_ready(error_msg)
+
+    def _emit_ready(self, error_msg=None):
+        """Save the error found while checking for updates and notify."""
         # Don't show dialog when starting up spyder and an error occur
         if not (self.startup and error_msg is not None):
             self.error = error_msg
@@ -150,11 +409,8 @@ class WorkerUpdates(QObject):
                 pass
 
 
-class WorkerDownloadInstaller(QObject):
-    """
-    Worker that donwloads standalone installers for Windows
-    and MacOS without blocking the Spyder user interface.
-    """
+class _WorkerDownloadInstallerSignals(QObject):
+    """Signals emitted by WorkerDownloadInstaller."""
 
     sig_ready = Signal(str)
     """
@@ -178,56 +434,178 @@ class WorkerDownloadInstaller(QObject):
         Total size of the file expected to be downloaded.
     """
 
+    sig_cancelled = Signal()
+    """Signal to inform that the download stopped after being cancelled."""
+
+
+class WorkerDownloadInstaller(_ThreadPoolWorker):
+    """
+    Worker that donwloads standalone installers for Windows
+    and MacOS without blocking the Spyder user interface.
+
+    It's meant to be run in a thread of the global QThreadPool with
+    ``worker.run_in_thread_pool()``.
+    """
+
     def __init__(self, parent, latest_release_version):
-        QObject.__init__(self)
+        _ThreadPoolWorker.__init__(self)
+
+        self._signals = _WorkerDownloadInstallerSignals()
+        self.sig_ready = self._signals.sig_ready
+        self.sig_download_progress = self._signals.sig_download_progress
+        self.sig_cancelled = self._signals.sig_cancelled
+
         self._parent = parent
         self.latest_release_version = latest_release_version
         self.error = None
         self.cancelled = False
         self.installer_path = None
 
-    def _progress_reporter(self, block_number, read_size, total_size):
-        """Calculate download progress and notify."""
-        progress = 0
-        if total_size > 0:
-            progress = block_number * read_size
-        if self.cancelled:
-            raise UpdateDownloadCancelledException()
-        self.sig_download_progress.emit(progress, total_size)
+        # The full installers are the ones that include numpy and pandas.
+        # Use find_spec to check that without importing them.
+        self._is_full_installer = (find_spec('numpy') is not None or
+                                   find_spec('pandas') is not None)
+
+    def _is_installer_up_to_date(self, url, installer_path):
+        """
+        Check if the installer at `installer_path` is the one served at `url`.
+
+        This compares the size of the local installer and the ETag saved
+        when it was downloaded with the ones sent by the server, so that
+        incomplete installers or ones replaced on Github are downloaded
+        again.
+        """
+        try:
+            response = _SESSION.head(url, allow_redirects=True,
+                                     timeout=_TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException:
+            # Use the installer we have if the server can't be reached
+            return True
+
+        size = response.headers.get('Content-Length')
+        if size is not None and int(size) != osp.getsize(installer_path):
+            return False
+
+        etag = response.headers.get('ETag')
+        saved_etag = _load_installer_validators(installer_path).get('etag')
+        if etag is not None and saved_etag is not None:
+            return etag == saved_etag
+
+        return True
 
     def _download_installer(self):
         """Donwload latest Spyder standalone installer executable."""
         logger.debug("Downloading installer executable")
         tmpdir = tempfile.gettempdir()
-        is_full_installer = (is_module_installed('numpy') or
-                             is_module_installed('pandas'))
         if os.name == 'nt':
-            name = 'Spyder_64bit_{}.exe'.format('full' if is_full_installer
-                                                else 'lite')
+            name = 'Spyder_64bit_{}.exe'.format(
+                'full' if self._is_full_installer else 'lite')
         else:
-            name = 'Spyder{}.dmg'.format('' if is_full_installer else '-Lite')
+            name = 'Spyder{}.dmg'.format(
+                '' if self._is_full_installer else '-Lite')
 
         url = ('https://github.com/spyder-ide/spyder/releases/latest/'
                f'download/{name}')
         dir_path = osp.join(tmpdir, 'spyder', 'updates')
-        os.makedirs(dir_path, exist_ok=True)
-        installer_dir_path = osp.join(
-            dir_path, self.latest_release_version)
-        os.makedirs(installer_dir_path, exist_ok=True)
-        for file in os.listdir(dir_path):
-            if file not in [__version__, self.latest_release_version]:
-                remove = osp.join(dir_path, file)
-                os.remove(remove)
-
+        installer_dir_path = osp.join(dir_path, self.latest_release_version)
         installer_path = osp.join(installer_dir_path, name)
         self.installer_path = installer_path
-        if not osp.isfile(installer_path):
-            logger.debug(
-                f"Downloading installer from {url} to {installer_path}")
-            urlretrieve(
-                url, installer_path, reporthook=self._progress_reporter)
-        else:
-            self._progress_reporter(1, 1)
+        if (osp.isfile(installer_path) and
+                self._is_installer_up_to_date(url, installer_path)):
+            self.sig_download_progress.emit(1, 1)
+            return
+
+        os.makedirs(installer_dir_path, exist_ok=True)
+
+        # Remove installers downloaded for other versions
+        keep = {__version__, self.latest_release_version}
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.name not in keep:
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.remove(entry.path)
+
+        self._download(url, installer_path)
+
+    def _download(self, url, installer_path):
+        """
+        Download the installer at `url` to `installer_path`.
+
+        The installer is first written to a partial file, so that the
+        download can be resumed from where it stopped if it was cancelled
+        or interrupted.
+        """
+        part_path = installer_path + '.part'
+
+        # Ask only for the data we don't have yet, as long as the installer
+        # wasn't replaced on the server since the partial file was written.
+        # That can only be checked with a strong ETag or the last
+        # modification date, so start over if neither of them is known.
+        validators = _load_installer_validators(installer_path)
+        validator = validators.get('etag')
+        if validator is None or validator.startswith('W/'):
+            validator = validators.get('last_modified')
+
+        resume = 0
+        if validator is not None and osp.isfile(part_path):
+            resume = osp.getsize(part_path)
+
+        headers = {}
+        if resume:
+            headers['Range'] = f'bytes={resume}-'
+            headers['If-Range'] = validator
+
+        # The download could have been cancelled while the worker was
+        # waiting for a thread of the pool.
+        if self.cancelled:
+            raise UpdateDownloadCancelledException()
+
+        logger.debug(f"Downloading installer from {url} to {installer_path}")
+        with _SESSION.get(url, headers=headers, stream=True,
+                          timeout=_TIMEOUT) as page:
+            if page.status_code == 416:
+                # The partial file can't be resumed, so start over
+                os.remove(part_path)
+                return self._download(url, installer_path)
+            page.raise_for_status()
+
+            # Save the validators of the installer to check if it changed
+            # when resuming its download or using it again.
+            _save_installer_validators(installer_path, page.headers)
+
+            # The server sends the whole installer again if it doesn't
+            # support ranges or the installer changed.
+            if page.status_code != 206:
+                resume = 0
+            total_size = resume + int(page.headers.get('Content-Length', 0))
+
+            # Read about a thousandth of the installer at a time to
+            # reduce the number of reads and progress notifications.
+            chunk_size = min(max(total_size // 1000, _MIN_CHUNK_SIZE),
+                             _MAX_CHUNK_SIZE)
+
+            downloaded = resume
+            reported = resume
+            self.sig_download_progress.emit(downloaded, total_size)
+            with open(part_path, 'ab' if resume else 'wb') as installer_file:
+                for chunk in page.iter_content(chunk_size=chunk_size):
+                    if self.cancelled:
+                        raise UpdateDownloadCancelledException()
+                    installer_file.write(chunk)
+                    downloaded += len(chunk)
+
+                    # Only notify progress after a significant amount of
+                    # data was received.
+                    if downloaded - reported >= _PROGRESS_STEP:
+                        self.sig_download_progress.emit(
+                            downloaded, total_size)
+                        reported = downloaded
+            self.sig_download_progress.emit(downloaded, total_size)
+
+        os.replace(part_path, installer_path)
 
     def start(self):
         """Main method of the WorkerDownloadInstaller worker."""
@@ -235,12 +613,16 @@ class WorkerDownloadInstaller(QObject):
         try:
             self._download_installer()
         except UpdateDownloadCancelledException:
-            if self.installer_path:
-               os.remove(self.installer_path)
+            # Keep what was downloaded so far to resume it later
+            try:
+                self.sig_cancelled.emit()
+            except RuntimeError:
+                pass
             return
-        except HTTPError:
+        except requests.HTTPError:
             error_msg = _('Unable to retrieve installer information.')
-        except URLError:
+        except (requests.ConnectionError,
+                requests.exceptions.ChunkedEncodingError):
             error_msg = _('Unable to connect to the internet. <br><br>'
                           'Make sure the connection is working properly.')
         except Exception: